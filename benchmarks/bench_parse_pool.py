@@ -0,0 +1,103 @@
+"""
+Find the concurrency at which parsing in a process pool beats parsing in the I/O threads.
+
+Usage:
+    python benchmarks/bench_parse_pool.py [--latency 0.3] [--lookups 400] [--threads 1 4 16 64 128]
+
+Each simulated lookup waits ``latency`` seconds (standing in for the GET/POST round
+trips) and then parses the saved form and result pages, like get_engineer_syndicate.
+For every thread count the lookups per second are measured with in-thread parsing and
+with a ParsePool, and the first thread count where the pool is faster is reported.
+
+In-thread parsing stops scaling once the threads keep one core busy parsing, i.e. at
+about ``latency / parse seconds per lookup`` threads; that projection is printed first.
+The pool can only win past that point: with spare cores it parses in parallel, and even
+on one core it can edge ahead because many lookup threads stop fighting over the GIL.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'src'))
+
+from scraper import HIDDEN_FIELDS, RESULT_FIELDS, ParsePool, _extract_inputs
+
+
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+
+
+def _pages():
+    return ((FIXTURES_DIR / "lastpaid_form.html").read_text(encoding="utf-8"),
+            (FIXTURES_DIR / "lastpaid_result.html").read_text(encoding="utf-8"))
+
+
+def parse_seconds(repeat: int = 20) -> float:
+    """Best in-thread CPU time to parse the form and result page of one lookup."""
+    form, result = _pages()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _extract_inputs(form, HIDDEN_FIELDS, "name")
+        _extract_inputs(result, RESULT_FIELDS, "id")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(threads: int, lookups: int, latency: float, extract) -> float:
+    """Return lookups per second for ``lookups`` simulated lookups on ``threads`` threads."""
+    form, result = _pages()
+
+    def lookup(_):
+        time.sleep(latency / 2)
+        extract(form, HIDDEN_FIELDS, "name")
+        time.sleep(latency / 2)
+        return extract(result, RESULT_FIELDS, "id")["txtSynd"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        assert all(ex.map(lookup, range(lookups)))
+    return lookups / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated network seconds per lookup")
+    parser.add_argument("--lookups", type=int, default=400)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64, 128])
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    parse = parse_seconds()
+    cores = os.cpu_count() or 1
+    print(f"Parsing costs {parse * 1000:.1f} ms per lookup: in-thread parsing tops out near "
+          f"{1 / parse:.0f} lookups/s, reached at about {args.latency / parse:.0f} threads.")
+    if cores == 1:
+        print("Only one CPU is available: any pool gain here comes from less GIL contention, "
+              "not from parallel parsing.")
+
+    crossover = None
+    with ParsePool(max_workers=args.workers, batch_size=args.batch_size) as pool:
+        # Warm the workers so process start-up is not counted
+        pool.extract("<input name='x' value='1'>", ("x",))
+        print(f"{'threads':>8}{'in-thread/s':>14}{'pool/s':>10}")
+        for n in args.threads:
+            local = run(n, args.lookups, args.latency, _extract_inputs)
+            pooled = run(n, args.lookups, args.latency, pool.extract)
+            print(f"{n:>8}{local:>14.1f}{pooled:>10.1f}")
+            if crossover is None and pooled > local:
+                crossover = n
+
+    if crossover is None:
+        print("In-thread parsing was at least as fast at every thread count tried.")
+    else:
+        print(f"Process pool overtakes in-thread parsing at {crossover} threads.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Compare full-page parsing with early-terminating streamed parsing of lastpaid.aspx responses.
+
+Usage:
+    python benchmarks/bench_streamed_parse.py [recorded_page.html ...]
+    python benchmarks/bench_streamed_parse.py --record 29501011234567 --out recordings/
+
+Recorded pages are replayed through a fake streamed response, so no network is needed.
+Without arguments the saved fixture page and synthetic pages with 100 KB, 400 KB and
+1.6 MB VIEWSTATEs are used.
+"""
+
+import argparse
+import base64
+import gzip
+import os
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'src'))
+
+from scraper import (URL, HIDDEN_FIELDS, RESULT_FIELDS, STREAM_CHUNK_SIZE,
+                     _extract_inputs, _read_until_fields)
+
+
+class ReplayResponse:
+    """Minimal stand-in for a streamed requests.Response backed by recorded bytes"""
+
+    def __init__(self, body: bytes, encoding: str = "utf-8"):
+        self._body = body
+        self.encoding = encoding
+        self.bytes_read = 0
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self._body), chunk_size):
+            chunk = self._body[i:i + chunk_size]
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+def synthetic_page(viewstate_bytes: int = 120_000) -> bytes:
+    """Build a page shaped like the search postback: hidden fields, result inputs, then chrome"""
+    viewstate = base64.b64encode(os.urandom(viewstate_bytes)).decode()
+    validation = base64.b64encode(os.urandom(2_000)).decode()
+    rows = "".join(f"<tr><td>بند {i}</td><td>{i}</td></tr>" for i in range(2_000))
+    return f"""<html><head><title>lastpaid</title></head><body>
+<form method="post" action="./lastpaid.aspx" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="CA0B0334" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{validation}" />
+<input name="txtdat" type="text" value="19/10/2026" id="txtdat" />
+<input name="NationalNumber" type="text" value="29501011234567" id="NationalNumber" />
+<input name="txtName" type="text" value="أحمد محمد علي" id="txtName" />
+<input name="txtSynd" type="text" value="القاهرة" id="txtSynd" />
+<table>{rows}</table>
+</form></body></html>""".encode("utf-8")
+
+
+def bench(body: bytes, repeat: int):
+    fields = RESULT_FIELDS + HIDDEN_FIELDS
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        full = _extract_inputs(body.decode("utf-8"), RESULT_FIELDS, attr="id")
+    full_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        resp = ReplayResponse(body)
+        html = _read_until_fields(resp, fields, STREAM_CHUNK_SIZE)
+        streamed = _extract_inputs(html, RESULT_FIELDS, attr="id")
+    streamed_time = (time.perf_counter() - start) / repeat
+
+    assert full == streamed, (full, streamed)
+    return {
+        "full_bytes": len(body),
+        "full_gzip_bytes": len(gzip.compress(body)),
+        "streamed_bytes": resp.bytes_read,
+        "streamed_gzip_bytes": len(gzip.compress(body[:resp.bytes_read])),
+        "full_ms": full_time * 1000,
+        "streamed_ms": streamed_time * 1000,
+    }
+
+
+def record(national_id: str, out_dir: Path):
+    """Save the raw GET and POST bodies of one real lookup for later replay"""
+    import requests
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    session = requests.Session()
+    headers = {"User-Agent": "Mozilla/5.0", "Content-Type": "application/x-www-form-urlencoded"}
+    r = session.get(URL, headers=headers, timeout=15)
+    r.raise_for_status()
+    (out_dir / "lastpaid_get.html").write_bytes(r.content)
+    form = _extract_inputs(r.text, HIDDEN_FIELDS)
+    payload = {k: v or "" for k, v in form.items()}
+    payload.update({"__EVENTTARGET": "", "__EVENTARGUMENT": "", "__LASTFOCUS": "",
+                    "NationalNumber": national_id, "btnSearch": "بحث"})
+    res = session.post(URL, data=payload, headers=headers, timeout=15)
+    res.raise_for_status()
+    (out_dir / "lastpaid_post.html").write_bytes(res.content)
+    print(f"Recorded responses to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Recorded lastpaid.aspx POST responses")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--record", metavar="NATIONAL_ID", help="Record a real lookup instead of benchmarking")
+    parser.add_argument("--out", default="recordings", help="Directory for --record")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, Path(args.out))
+        return
+
+    pages = [(p, Path(p).read_bytes()) for p in args.pages]
+    if not pages:
+        fixture = BENCH_DIR / "fixtures" / "lastpaid_result.html"
+        pages = [(fixture.name, fixture.read_bytes())]
+        pages += [(f"synthetic {kb} KB VIEWSTATE", synthetic_page(kb * 1000)) for kb in (100, 400, 1600)]
+    for label, body in pages:
+        r = bench(body, args.repeat)
+        print(f"{label}:")
+        print(f"  bytes      full {r['full_bytes']:>9,}  streamed {r['streamed_bytes']:>9,}"
+              f"  ({r['streamed_bytes'] / r['full_bytes']:.0%})")
+        print(f"  gzip bytes full {r['full_gzip_bytes']:>9,}  streamed {r['streamed_gzip_bytes']:>9,}")
+        print(f"  parse time full {r['full_ms']:8.2f}ms  streamed {r['streamed_ms']:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
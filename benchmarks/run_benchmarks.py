@@ -0,0 +1,264 @@
+"""
+Offline micro-benchmarks for HTML parsing and Excel I/O with regression thresholds.
+
+Usage:
+    python benchmarks/run_benchmarks.py                    # compare against baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline  # record new baseline numbers
+    python benchmarks/run_benchmarks.py --full             # also run the 1M-row workbook
+    python benchmarks/run_benchmarks.py -k read_ids        # only cases whose name contains 'read_ids'
+
+Each case is timed (best of several runs) and then run once more under tracemalloc for
+peak memory. The run exits with status 1 if any case is slower or uses more memory than
+its baseline by more than the configured threshold, or if a case has no baseline
+entry at all. Baselines are machine specific: record them on the machine that runs the
+comparison, including ``--full --update-baseline`` before relying on ``--full``.
+
+Fixture pages live in benchmarks/fixtures; replace them with recorded lastpaid.aspx
+responses to benchmark against real pages. Generated workbooks are cached in
+benchmarks/.cache so only the first run pays for creating them.
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'src'))
+
+from scraper import HIDDEN_FIELDS, RESULT_FIELDS, _extract_inputs
+from excel_handler import (_clean_id_value, _find_id_column, read_national_ids_from_excel,
+                           write_results_to_excel)
+
+
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+CACHE_DIR = BENCH_DIR / ".cache"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+DEFAULT_SIZES = (10_000, 100_000)
+FULL_SIZES = DEFAULT_SIZES + (1_000_000,)
+
+
+def _random_id(rnd: random.Random) -> str:
+    return f"{rnd.choice('23')}{rnd.randint(0, 10**13 - 1):013d}"
+
+
+def _messy_ids(n: int, seed: int = 1):
+    """IDs in the shapes seen in real sheets: clean strings, float artifacts, spaces, dashes."""
+    rnd = random.Random(seed)
+    values = []
+    for i in range(n):
+        nid = _random_id(rnd)
+        kind = i % 4
+        if kind == 1:
+            nid = nid + ".0"
+        elif kind == 2:
+            nid = f" {nid[:7]} {nid[7:]} "
+        elif kind == 3:
+            nid = f"{nid[:7]}-{nid[7:]}"
+        values.append(nid)
+    return values
+
+
+def generated_workbook(rows: int) -> Path:
+    """Return a cached HR-style workbook with ``rows`` data rows, creating it if needed."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    path = CACHE_DIR / f"ids_{rows}.xlsx"
+    if path.exists():
+        return path
+    rnd = random.Random(rows)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["ANAME", "Department", "الرقم القومى", "Phone", "Hire Date"])
+    for i in range(rows):
+        ws.append([f"موظف {i}", f"Dept {i % 40}", _random_id(rnd),
+                   f"01{rnd.randint(0, 10**9 - 1):09d}", f"20{i % 25:02d}-01-01"])
+    wb.save(path)
+    return path
+
+
+# ------------------ Cases ------------------
+# Each factory returns (setup, run) or (setup, run, teardown): setup runs once outside
+# the measurement and its result is passed to run, which is the measured code, and to
+# teardown, which cleans up after the case.
+
+def case_parse_result_page():
+    html = (FIXTURES_DIR / "lastpaid_result.html").read_text(encoding="utf-8")
+
+    def run(page):
+        fields = _extract_inputs(page, RESULT_FIELDS, attr="id")
+        assert fields["txtSynd"]
+        return fields
+
+    return lambda: html, run
+
+
+def case_parse_form_page():
+    html = (FIXTURES_DIR / "lastpaid_form.html").read_text(encoding="utf-8")
+
+    def run(page):
+        fields = _extract_inputs(page, HIDDEN_FIELDS)
+        assert fields["__VIEWSTATE"]
+        return fields
+
+    return lambda: html, run
+
+
+def case_clean_id_value(n):
+    def setup():
+        return pd.Series(_messy_ids(n), dtype=str)
+
+    def run(series):
+        return [_clean_id_value(v) for v in series]
+
+    return setup, run
+
+
+def case_find_id_column(columns):
+    def setup():
+        names = [f"Field {i}" for i in range(columns - 1)] + ["الرقم القومى (National ID)"]
+        return pd.DataFrame(columns=names)
+
+    def run(df):
+        assert _find_id_column(df) is not None
+
+    return setup, run
+
+
+def case_read_ids(rows):
+    def setup():
+        return generated_workbook(rows)
+
+    def run(path):
+        ids = read_national_ids_from_excel(str(path))
+        assert len(ids) == rows
+
+    return setup, run
+
+
+def case_write_results(rows):
+    def setup():
+        rnd = random.Random(rows)
+        results = [
+            {"success": True, "national_id": _random_id(rnd), "syndicate": "القاهرة", "name": f"مهندس {i}"}
+            for i in range(rows)
+        ]
+        out = Path(tempfile.gettempdir()) / f"bench_write_{rows}.xlsx"
+        return results, out
+
+    def run(args):
+        results, out = args
+        write_results_to_excel(results, str(out))
+
+    def teardown(args):
+        args[1].unlink(missing_ok=True)
+
+    return setup, run, teardown
+
+
+def build_cases(sizes):
+    cases = {
+        "parse_result_page": case_parse_result_page(),
+        "parse_form_page": case_parse_form_page(),
+        "find_id_column_500_cols": case_find_id_column(500),
+    }
+    for n in sizes:
+        cases[f"clean_id_value_{n}"] = case_clean_id_value(n)
+        cases[f"read_ids_{n}"] = case_read_ids(n)
+        cases[f"write_results_{n}"] = case_write_results(n)
+    return cases
+
+
+# ------------------ Measurement ------------------
+
+def measure(setup, run, teardown=None, min_time: float = 1.0, max_repeat: int = 50):
+    """Return (best seconds per run, peak traced MiB) for one case."""
+    arg = setup()
+    try:
+        times = []
+        total = 0.0
+        while len(times) < max_repeat and (total < min_time or len(times) < 3):
+            gc.collect()
+            start = time.perf_counter()
+            run(arg)
+            elapsed = time.perf_counter() - start
+            times.append(elapsed)
+            total += elapsed
+            # Slow cases: a single run is representative enough
+            if elapsed > min_time:
+                break
+
+        gc.collect()
+        tracemalloc.start()
+        run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        if teardown is not None:
+            teardown(arg)
+    return min(times), peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to baseline.json")
+    parser.add_argument("--full", action="store_true", help="Include 1M-row workbooks")
+    parser.add_argument("-k", dest="keyword", help="Only run cases whose name contains this text")
+    parser.add_argument("--time-threshold", type=float, default=0.30,
+                        help="Allowed relative slowdown before failing (default 0.30 = 30%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.20,
+                        help="Allowed relative peak memory growth before failing (default 0.20 = 20%%)")
+    args = parser.parse_args()
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    cases = build_cases(FULL_SIZES if args.full else DEFAULT_SIZES)
+
+    results = {}
+    failures = []
+    print(f"{'case':<28}{'time':>12}{'base':>12}{'peak MiB':>12}{'base':>10}")
+    for name, case in cases.items():
+        if args.keyword and args.keyword not in name:
+            continue
+        seconds, peak = measure(*case)
+        results[name] = {"seconds": round(seconds, 6), "peak_mib": round(peak, 3)}
+
+        base = baseline.get(name)
+        status = ""
+        if base is None and not args.update_baseline:
+            # A case without a baseline would otherwise pass silently
+            status = " NO BASELINE"
+            failures.append(name)
+        elif base and not args.update_baseline:
+            if seconds > base["seconds"] * (1 + args.time_threshold):
+                status += " TIME REGRESSION"
+            if peak > base["peak_mib"] * (1 + args.memory_threshold):
+                status += " MEMORY REGRESSION"
+            if status:
+                failures.append(name)
+        base_time = f"{base['seconds'] * 1000:.2f}ms" if base else "-"
+        base_peak = f"{base['peak_mib']:.1f}" if base else "-"
+        print(f"{name:<28}{seconds * 1000:>10.2f}ms{base_time:>12}{peak:>12.1f}{base_peak:>10}{status}")
+
+    if args.update_baseline:
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if failures:
+        print(f"\n{len(failures)} case(s) regressed beyond threshold or have no baseline: "
+              f"{', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Live throughput, latency and error statistics for batch lookups
+"""
+
+import math
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+
+# Labels shown for each error category (matched on the error text from get_engineer_syndicate_safe)
+ERROR_CATEGORIES = (
+    ("Validation Error", "validation"),
+    ("Network Error", "network"),
+    ("No data found", "no_data"),
+    ("Cancelled", "cancelled"),
+)
+
+
+def categorize_error(error: Optional[str]) -> str:
+    """Map an error message from a failed lookup to a short category name."""
+    text = error or ""
+    for prefix, category in ERROR_CATEGORIES:
+        if text.startswith(prefix):
+            return category
+    return "other"
+
+
+def _percentile(sorted_values, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class BatchStats:
+    """
+    Thread-safe collector of per-lookup timings for a batch run.
+
+    Throughput is an exponentially weighted moving average of the interval between
+    completed lookups, so a single stall moves the estimate gradually instead of
+    skewing a since-start average for the rest of the run.
+    """
+
+    def __init__(self, alpha: float = 0.2, window: int = 500):
+        """
+        :param alpha: EWMA smoothing factor, higher reacts faster
+        :param window: Number of recent latencies kept for percentiles
+        """
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._errors = Counter()
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._interval = None
+        self._last_done = None
+
+    def start_lookup(self):
+        """Record that a lookup has been sent."""
+        with self._lock:
+            self.in_flight += 1
+            if self._last_done is None:
+                self._last_done = time.monotonic()
+
+    def finish_lookup(self, latency: float, result: dict, cache_hit: Optional[bool] = None):
+        """
+        Record a finished lookup.
+
+        :param latency: Seconds the lookup took
+        :param result: Result dictionary from get_engineer_syndicate_safe
+        :param cache_hit: Whether the result came from a cache (None if no cache was involved)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.completed += 1
+            self._latencies.append(latency)
+            if not result.get('success'):
+                self.failed += 1
+                self._errors[categorize_error(result.get('error'))] += 1
+            if cache_hit is True:
+                self.cache_hits += 1
+            elif cache_hit is False:
+                self.cache_misses += 1
+
+            if self._last_done is not None:
+                dt = now - self._last_done
+                if self._interval is None:
+                    self._interval = dt
+                else:
+                    self._interval = self.alpha * dt + (1 - self.alpha) * self._interval
+            self._last_done = now
+
+    def abandon_lookup(self):
+        """Record that a sent lookup was given up (e.g. on Stop) and will not finish."""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def _current_interval(self, now: float) -> Optional[float]:
+        """Smoothed interval, stretched by the time since the last completion during a stall."""
+        if self._interval is None:
+            return None
+        since_last = now - self._last_done
+        return max(self._interval, since_last)
+
+    def throughput(self) -> Optional[float]:
+        """Smoothed lookups per second, or None before the first completion."""
+        with self._lock:
+            interval = self._current_interval(time.monotonic())
+        if not interval:
+            return None
+        return 1.0 / interval
+
+    def eta(self, remaining: int) -> Optional[float]:
+        """Estimated seconds to finish ``remaining`` lookups at the smoothed throughput."""
+        rate = self.throughput()
+        if rate is None:
+            return None
+        return remaining / rate
+
+    def snapshot(self) -> dict:
+        """Return a consistent copy of the current statistics for display."""
+        with self._lock:
+            interval = self._current_interval(time.monotonic())
+            latencies = sorted(self._latencies)
+            cache_total = self.cache_hits + self.cache_misses
+            return {
+                "completed": self.completed,
+                "in_flight": self.in_flight,
+                "throughput": 1.0 / interval if interval else None,
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "error_rate": self.failed / self.completed if self.completed else None,
+                "errors": dict(self._errors),
+                "cache_hit_ratio": self.cache_hits / cache_total if cache_total else None,
+            }
@@ -6,7 +6,7 @@ import re
 import openpyxl
 from openpyxl import Workbook, load_workbook
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 import pandas as pd
 
 
@@ -67,6 +67,60 @@ def _find_id_column(df: pd.DataFrame, preferred: Optional[str] = None) -> Option
 
 
 
+def _read_id_columns(file_path: str, id_column: Optional[str] = None,
+                     extra_columns: Sequence[str] = ()) -> Tuple[pd.DataFrame, str]:
+    """
+    Detect the National ID column from the header row and load only that column.
+
+    Columns in ``extra_columns`` are loaded too when the sheet has them. For .xlsx/.xlsm
+    files the header and the wanted columns come from a single read-only openpyxl pass
+    that skips every other column; other formats read the header first and then the
+    wanted columns with ``usecols``. Values are returned as strings (None when empty),
+    indexed like ``pd.read_excel`` would index the sheet.
+
+    :param file_path: Path to the Excel file
+    :param id_column: Preferred name of the National ID column
+    :param extra_columns: Other columns to load if present
+    :return: Tuple of (dataframe with the loaded columns, name of the ID column)
+    :raises ValueError: if no National ID column is found
+    """
+    if Path(file_path).suffix.lower() not in ('.xlsx', '.xlsm'):
+        columns = [str(c) for c in pd.read_excel(file_path, nrows=0).columns]
+        id_col = _find_id_column(pd.DataFrame(columns=columns), id_column)
+        if id_col is None:
+            raise ValueError(f"Could not find a National ID column. Available columns: {', '.join(columns)}")
+        wanted = [id_col] + [c for c in extra_columns if c in columns and c != id_col]
+        return pd.read_excel(file_path, dtype=str, usecols=wanted), id_col
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return _sheet_id_columns(wb.worksheets[0], id_column, extra_columns)
+    finally:
+        wb.close()
+
+
+def _sheet_id_columns(ws, id_column: Optional[str] = None,
+                      extra_columns: Sequence[str] = ()) -> Tuple[pd.DataFrame, str]:
+    """Body of _read_id_columns for an already opened openpyxl worksheet."""
+    header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    # Same names pandas gives these headers, so detection behaves like the full read
+    columns = [f"Unnamed: {i}" if v is None else str(v) for i, v in enumerate(header)]
+    id_col = _find_id_column(pd.DataFrame(columns=columns), id_column)
+    if id_col is None:
+        raise ValueError(f"Could not find a National ID column. Available columns: {', '.join(columns)}")
+
+    wanted = [columns.index(id_col)]
+    wanted += [columns.index(c) for c in extra_columns if c in columns and c != id_col]
+    lo, hi = min(wanted), max(wanted)
+    data = {columns[i]: [] for i in wanted}
+    for row in ws.iter_rows(min_row=2, min_col=lo + 1, max_col=hi + 1, values_only=True):
+        for i in wanted:
+            v = row[i - lo] if i - lo < len(row) else None
+            data[columns[i]].append(None if v is None else str(v))
+
+    return pd.DataFrame(data, dtype=object), id_col
+
+
 def read_national_ids_from_excel(file_path: str, column_name: Optional[str] = None) -> List[str]:
     """
     Read national IDs from an Excel file.
@@ -76,14 +130,8 @@ def read_national_ids_from_excel(file_path: str, column_name: Optional[str] = No
     :return: List of national ID strings
     """
     try:
-        # Read as strings where possible to preserve ID formatting
-        df = pd.read_excel(file_path, dtype=str)
-
-        id_col = _find_id_column(df, column_name)
-        if id_col is None:
-            raise ValueError(
-                f"Could not find a National ID column. Available columns: {', '.join(df.columns)}"
-            )
+        # Read only the ID column, as strings to preserve ID formatting
+        df, id_col = _read_id_columns(file_path, column_name)
 
         series = df[id_col].dropna().astype(str)
 
@@ -113,49 +161,175 @@ def write_results_to_excel(results: List[Dict], output_path: str):
         raise Exception(f"Error writing to Excel file: {str(e)}")
 
 
+# Prefixes get_engineer_syndicate_safe puts in front of failures that end up in the syndicate column
+_ERROR_PREFIXES = ("Validation Error", "Network Error", "Error", "No data found", "Cancelled")
+
+
+def _syndicate_cell(result: Dict) -> str:
+    """Value written to the syndicate column; failures always start with an error prefix."""
+    if result.get('success'):
+        return result.get('syndicate', '')
+    error = str(result.get('error') or 'Error')
+    # Unexpected exceptions come back as bare messages; prefix them so incremental runs retry them
+    if not error.startswith(_ERROR_PREFIXES):
+        error = f"Error: {error}"
+    return error
+
+
+def _needs_lookup(syndicate: object, checked_at: object, cutoff: Optional[pd.Timestamp]) -> bool:
+    """Decide whether a row from a previous run should be looked up again.
+
+    A row is retried when its syndicate cell is empty or holds an error message, or when a
+    staleness cutoff is given and the row was last checked before it (or never).
+    """
+    if pd.isna(syndicate) or not str(syndicate).strip():
+        return True
+    if str(syndicate).strip().startswith(_ERROR_PREFIXES):
+        return True
+    if cutoff is not None:
+        checked = pd.to_datetime(checked_at, errors='coerce')
+        if pd.isna(checked) or checked < cutoff:
+            return True
+    return False
+
+
+def _write_columns_in_place(ws, columns: Dict[str, Dict[int, object]]):
+    """
+    Add or update whole columns on an openpyxl worksheet.
+
+    Only the given cells are touched, so formatting, formulas and other sheets are kept.
+    Columns are matched by their header in the first row and appended after the last
+    used column when missing.
+
+    :param ws: Worksheet to update
+    :param columns: Mapping of header -> {dataframe row index: value}
+    """
+    headers = {cell.value: cell.column for cell in ws[1] if cell.value is not None}
+    next_col = ws.max_column + 1
+    for header, values in columns.items():
+        col = headers.get(header)
+        if col is None:
+            col = next_col
+            next_col += 1
+            ws.cell(row=1, column=col, value=header)
+        for idx, value in values.items():
+            # DataFrame row 0 is sheet row 2, right below the header
+            ws.cell(row=idx + 2, column=col, value=value)
+
+
 def append_syndicate_to_excel(file_path: str, output_path: str = None,
                                id_column: Optional[str] = None,
                                syndicate_column: str = "Syndicate",
-                               name_column: str = "Name"):
+                               name_column: str = "Name",
+                               incremental: bool = False,
+                               max_age_days: Optional[float] = None,
+                               checked_column: str = "Last Checked",
+                               preserve_formatting: bool = True):
     """
     Read an Excel file with national IDs, look up syndicates and names, and write results.
+
+    In incremental mode the existing result columns are reused: only rows whose syndicate
+    is empty, holds an error, or was checked more than ``max_age_days`` ago are looked up
+    again, and the new values are merged into those rows in place.
+
+    For .xlsx/.xlsm files the result columns are written into the original workbook with
+    openpyxl, leaving formatting, formulas and other sheets untouched. The workbook is
+    still parsed and saved in full once, so this preserves the file rather than saving
+    time over the pandas rewrite. Otherwise the sheet is rewritten from the dataframe.
     
     :param file_path: Input Excel file path
     :param output_path: Output Excel file path (if None, overwrites input)
     :param id_column: Column name for national IDs
     :param syndicate_column: Column name for syndicate results
     :param name_column: Column name for name results
+    :param incremental: Only look up rows that are missing, failed or stale
+    :param max_age_days: Re-check successful rows older than this many days (incremental mode only)
+    :param checked_column: Column name for the timestamp of each row's last lookup; only
+        written in incremental mode or when the sheet already has it
+    :param preserve_formatting: Update the workbook in place instead of rewriting it with pandas
     :return: Path to the output file
+    :raises ValueError: if ``max_age_days`` is given without ``incremental``
     """
+    if max_age_days is not None and not incremental:
+        raise ValueError("max_age_days only applies to incremental runs.")
+
     from .scraper import get_engineer_syndicate_safe
+    from .profiling import profile_run
 
     if output_path is None:
         output_path = file_path
 
-    # Read the Excel file as strings
-    df = pd.read_excel(file_path, dtype=str)
+    with profile_run(output_path):
+        _append_syndicate(
+            file_path, output_path, get_engineer_syndicate_safe,
+            id_column=id_column,
+            syndicate_column=syndicate_column,
+            name_column=name_column,
+            incremental=incremental,
+            max_age_days=max_age_days,
+            checked_column=checked_column,
+            preserve_formatting=preserve_formatting
+        )
 
-    id_col = _find_id_column(df, id_column)
-    if id_col is None:
-        raise ValueError(f"Could not find National ID column in file. Columns: {', '.join(df.columns)}")
+    return output_path
 
-    # Process each national ID
-    syndicates = []
-    names = []
-    for national_id in df[id_col].dropna().astype(str):
-        clean_id = _clean_id_value(national_id)
-        result = get_engineer_syndicate_safe(clean_id)
-        syndicates.append(result.get('syndicate', result.get('error', 'Error')))
-        names.append(result.get('name', ''))
 
-    # Add results to dataframe
-    df[name_column] = names
-    df[syndicate_column] = syndicates
+def _append_syndicate(file_path, output_path, lookup, id_column, syndicate_column, name_column,
+                      incremental, max_age_days, checked_column, preserve_formatting):
+    """Body of append_syndicate_to_excel, split out so it can run under the profiler."""
+    in_place = preserve_formatting and Path(file_path).suffix.lower() in ('.xlsx', '.xlsm')
+
+    if in_place:
+        # The formula-mode workbook is what gets saved; when the ID and result columns hold
+        # plain values they are read from it too, so the file is only parsed once
+        wb = load_workbook(file_path, keep_vba=Path(file_path).suffix.lower() == '.xlsm')
+        ws = wb.worksheets[0]
+        extra = (syndicate_column, checked_column)
+        df, id_col = _sheet_id_columns(ws, id_column, extra)
+        if any(isinstance(v, str) and v.startswith('=') for col in df.columns for v in df[col]):
+            # Formula cells (e.g. =TEXT(A2,"0")) must be read as their cached values
+            df, id_col = _read_id_columns(file_path, id_column, extra)
+    else:
+        # The whole sheet is rewritten, so read all of it as strings
+        df = pd.read_excel(file_path, dtype=str)
+        id_col = _find_id_column(df, id_column)
+        if id_col is None:
+            raise ValueError(f"Could not find National ID column in file. Columns: {', '.join(df.columns)}")
+
+    # Timestamps are only kept for incremental runs, or when an earlier run already added them
+    write_checked = incremental or checked_column in df.columns
+    result_columns = [name_column, syndicate_column] + ([checked_column] if write_checked else [])
+    for col in result_columns:
+        if col not in df.columns:
+            df[col] = None
+
+    cutoff = None
+    if max_age_days is not None:
+        cutoff = pd.Timestamp.now() - pd.Timedelta(days=max_age_days)
+
+    # Process each national ID, recording results by row so skipped rows keep their values
+    updates = {col: {} for col in result_columns}
+    for idx, national_id in df[id_col].dropna().astype(str).items():
+        if incremental and not _needs_lookup(df.at[idx, syndicate_column],
+                                             df.at[idx, checked_column], cutoff):
+            continue
+        clean_id = _clean_id_value(national_id)
+        result = lookup(clean_id)
+        updates[syndicate_column][idx] = _syndicate_cell(result)
+        updates[name_column][idx] = result.get('name', '')
+        if write_checked:
+            updates[checked_column][idx] = pd.Timestamp.now().isoformat(timespec='seconds')
 
     # Write to Excel
-    df.to_excel(output_path, index=False, engine='openpyxl')
+    if in_place:
+        _write_columns_in_place(ws, updates)
+        wb.save(output_path)
+        return
 
-    return output_path
+    for col, values in updates.items():
+        for idx, value in values.items():
+            df.at[idx, col] = value
+    df.to_excel(output_path, index=False, engine='openpyxl')
 
 
 def create_sample_excel(output_path: str, sample_ids: List[str] = None):
@@ -6,6 +6,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
 import time
+from concurrent.futures import Future, wait
 from pathlib import Path
 import sys
 import os
@@ -13,15 +14,33 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from scraper import get_engineer_syndicate_safe
+from scraper import get_engineer_syndicate_safe, CancelToken, warm_up_form, has_warm_form
 from excel_handler import read_national_ids_from_excel, write_results_to_excel
+from profiling import profile_run
+from batch_stats import BatchStats
+
+
+def _submit_daemon(fn, *args, **kwargs) -> Future:
+    """Run fn on a daemon thread, so closing the window never waits for it to finish."""
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
 
 
 class AppWindow:
     def __init__(self, root):
         self.root = root
         self.root.title("البحث في نقابة المهندسين")
-        self.root.geometry("600x500")
+        self.root.geometry("600x640")
         self.root.resizable(False, False)
         
         # Configure style
@@ -29,9 +48,14 @@ class AppWindow:
         self.style.theme_use('clam')
         # Event to request stopping long-running processing
         self._stop_event = threading.Event()
+        # Cancels the in-flight lookup of the running batch when Stop is pressed
+        self._cancel_token = None
         self._current_results = None
         self._current_output_path = None
         self._processing = False
+        self._stats = None
+        # Background form prefetch for the single lookup, if one is running
+        self._warm_thread = None
         
         self.setup_ui()
         
@@ -70,6 +94,9 @@ class AppWindow:
         self.entry_id = ttk.Entry(main_frame, width=25, font=('Segoe UI', 10), justify='right')
         self.entry_id.grid(row=2, column=1, pady=5, padx=(10, 5), sticky=tk.W)
         self.entry_id.bind('<Return>', lambda e: self.lookup_single_id())
+        # Prefetch the form while the user is typing so Enter only needs the POST
+        self.entry_id.bind('<FocusIn>', lambda e: self.prefetch_form())
+        self.entry_id.bind('<KeyRelease>', self._on_id_typed)
         
         # Lookup button
         self.btn_lookup = ttk.Button(
@@ -156,6 +183,20 @@ class AppWindow:
             foreground='blue'
         )
         self.progress_label.grid(row=10, column=0, columnspan=3, pady=2)
+
+        # Live statistics panel for the running batch
+        stats_frame = ttk.LabelFrame(main_frame, text="إحصائيات المعالجة", padding=5)
+        stats_frame.grid(row=11, column=0, columnspan=3, sticky='ew', pady=(5, 0))
+        stats_frame.grid_columnconfigure(0, weight=1)
+        self.stats_label = ttk.Label(
+            stats_frame,
+            text="",
+            font=('Segoe UI', 9),
+            anchor='e',
+            justify='right'
+        )
+        self.stats_label.grid(row=0, column=0, sticky='ew')
+        self.update_stats_panel()
         
         # Status bar at bottom
         self.status_label = ttk.Label(
@@ -165,7 +206,7 @@ class AppWindow:
             relief=tk.SUNKEN,
             anchor='e'
         )
-        self.status_label.grid(row=11, column=0, columnspan=3, sticky='ew', pady=(10, 0))
+        self.status_label.grid(row=12, column=0, columnspan=3, sticky='ew', pady=(10, 0))
         
     def lookup_single_id(self):
         """Look up a single national ID"""
@@ -182,12 +223,40 @@ class AppWindow:
         
         # Run in thread to prevent UI freeze
         def lookup_thread():
-            result = get_engineer_syndicate_safe(national_id)
+            # A prefetch already in progress is further along than a new GET would be
+            warm_thread = self._warm_thread
+            if warm_thread is not None:
+                warm_thread.join()
+            result = get_engineer_syndicate_safe(national_id, use_warm_form=True)
             self.root.after(0, self.display_single_result, result)
         
         thread = threading.Thread(target=lookup_thread, daemon=True)
         thread.start()
     
+    def _on_id_typed(self, event):
+        """Start prefetching once the entry holds most of an ID"""
+        if event.keysym in ('Return', 'KP_Enter'):
+            # The lookup just consumed the form; don't fetch another one for it
+            return
+        digits = sum(ch.isdigit() for ch in self.entry_id.get())
+        if digits >= 10:
+            self.prefetch_form()
+
+    def prefetch_form(self):
+        """Fetch the search form in the background unless a fresh one is ready"""
+        if (self._warm_thread is not None and self._warm_thread.is_alive()) or has_warm_form():
+            return
+
+        def warm_thread():
+            try:
+                warm_up_form()
+            except Exception as e:
+                # The lookup itself will fetch the form and report any real problem
+                print(f"Form prefetch failed: {e}")
+
+        self._warm_thread = threading.Thread(target=warm_thread, daemon=True)
+        self._warm_thread.start()
+
     def display_single_result(self, result):
         """Display the result of a single ID lookup"""
         self.btn_lookup.config(state='normal')
@@ -246,11 +315,16 @@ class AppWindow:
         self.btn_process.config(state='disabled')
         self.btn_stop.config(state='normal')
         self._stop_event.clear()
+        self._cancel_token = CancelToken()
         self._processing = True
+        self._stats = BatchStats()
         self.progress_label.config(text="جار المعالجة...")
         self.status_label.config(text="جار قراءة ملف الإكسل...")
+        self.root.after(500, self._refresh_stats)
         
-        def process_thread():
+        cancel = self._cancel_token
+
+        def run_batch(profiled):
             try:
                 # Read IDs from Excel
                 national_ids = read_national_ids_from_excel(file_path)
@@ -271,15 +345,30 @@ class AppWindow:
                 self._current_results = results
                 self._current_output_path = output_path
                 self._processing = True
-                start_time = time.time()
+                stats = self._stats
                 for i, national_id in enumerate(national_ids, 1):
                     # Check for stop request and break early if requested
                     if self._stop_event.is_set():
                         print("Stop requested, breaking processing loop")
                         break
+                    stats.start_lookup()
+                    started = time.perf_counter()
+                    print(f"Processing {i}/{total}: {national_id}")
+                    # Each lookup runs on a daemon thread so neither Stop nor closing the window
+                    # waits for a request to time out, and through profiled so --profile covers
+                    # it. Streaming lets cancel() abort the body read by closing the response.
+                    future = _submit_daemon(profiled, get_engineer_syndicate_safe, national_id,
+                                            stream=True, cancel=cancel)
+                    while not wait([future], timeout=0.1).done:
+                        if self._stop_event.is_set():
+                            break
+                    if not future.done():
+                        # Abandon the in-flight lookup; its result would be a cancellation anyway
+                        print("Stop requested, breaking processing loop")
+                        stats.abandon_lookup()
+                        break
                     try:
-                        print(f"Processing {i}/{total}: {national_id}")
-                        result = get_engineer_syndicate_safe(national_id)
+                        result = future.result()
                     except Exception as item_exc:
                         # Record failure for this ID and continue
                         result = {
@@ -290,6 +379,11 @@ class AppWindow:
                         }
                         print(f"Error processing {national_id}: {item_exc}")
 
+                    if cancel.cancelled and not result.get('success'):
+                        # Interrupted by Stop rather than a genuine failure; leave it out
+                        stats.abandon_lookup()
+                        break
+                    stats.finish_lookup(time.perf_counter() - started, result)
                     results.append(result)
                     # Update progress bar and labels
                     # Update progress value
@@ -299,27 +393,37 @@ class AppWindow:
                     except Exception:
                         pass
 
-                    # Estimate remaining time
-                    elapsed = time.time() - start_time
-                    avg_per = elapsed / i if i else 0
-                    remaining = max(0, int(avg_per * (total - i)))
-                    mins, secs = divmod(remaining, 60)
-                    hours, mins = divmod(mins, 60)
-                    eta = f"{hours:d}h {mins:d}m {secs:d}s" if hours else f"{mins:d}m {secs:d}s"
+                    # Estimate remaining time from the smoothed throughput
+                    remaining = stats.eta(total - i)
+                    if remaining is None:
+                        eta = "—"
+                    else:
+                        mins, secs = divmod(int(remaining), 60)
+                        hours, mins = divmod(mins, 60)
+                        eta = f"{hours:d}h {mins:d}m {secs:d}s" if hours else f"{mins:d}m {secs:d}s"
 
                     progress_text = f"جار المعالجة {i}/{total} — متوقع: {eta}"
                     self.root.after(0, lambda pt=progress_text: self.progress_label.config(text=pt))
 
-                # Write results
+                # Write results (once; a stopped run goes to a _partial file)
+                stopped = self._stop_event.is_set()
+                save_path = output_path
+                if stopped:
+                    p = Path(output_path)
+                    save_path = str(p.with_name(p.stem + "_partial" + p.suffix))
                 try:
-                    write_results_to_excel(results, output_path)
+                    if results or not stopped:
+                        write_results_to_excel(results, save_path)
                 except Exception as write_exc:
                     print(f"Error writing results: {write_exc}")
                     self.root.after(0, self.show_process_error, str(write_exc))
                     return
 
-                # Show success
-                self.root.after(0, self.show_process_complete, output_path, results)
+                if stopped:
+                    self.root.after(0, self.show_process_stopped, save_path, results)
+                else:
+                    # Show success
+                    self.root.after(0, self.show_process_complete, output_path, results)
                 
             except Exception as e:
                 print(f"Batch processing error: {e}")
@@ -338,6 +442,11 @@ class AppWindow:
                     self._processing = False
 
                 self.root.after(0, finish_buttons)
+
+        def process_thread():
+            # Profiles the run when enabled with --profile or SYNDICATE_PROFILE=1
+            with profile_run(output_path) as profiled:
+                run_batch(profiled)
         
         thread = threading.Thread(target=process_thread, daemon=True)
         thread.start()
@@ -369,6 +478,24 @@ class AppWindow:
         )
         self.status_label.config(text=f"اكتملت: {success_count}/{total_count} ناجحة")
     
+    def show_process_stopped(self, partial_path, results):
+        """Show the outcome of a batch stopped by the user"""
+        self.btn_process.config(state='normal')
+        self.progress_label.config(text="")
+        self._current_results = None
+        self._current_output_path = None
+
+        if not results:
+            self.status_label.config(text="تم الإيقاف — لا توجد نتائج لحفظها")
+            return
+        success_count = sum(1 for r in results if r['success'])
+        self.status_label.config(text=f"تم حفظ النتائج الجزئية: {Path(partial_path).name}")
+        messagebox.showinfo(
+            "مؤقت",
+            f"تم حفظ النتائج الجزئية في:\n{partial_path}\n\n"
+            f"الناجحة: {success_count}/{len(results)}"
+        )
+
     def show_process_error(self, error_msg):
         """Show error message"""
         self.btn_process.config(state='normal')
@@ -383,26 +510,39 @@ class AppWindow:
             pass
 
     def request_stop(self):
-        """Request the worker thread to stop and save current partial results."""
+        """Stop the batch now: cancel the in-flight lookup and let the worker save partial results."""
         if not self._processing:
             return
         self._stop_event.set()
+        if self._cancel_token is not None:
+            self._cancel_token.cancel()
+        self.btn_stop.config(state='disabled')
         self.status_label.config(text="تم طلب الإيقاف — جار حفظ النتائج الجزئية...")
-
-        # If we have partial results, save them immediately
-        try:
-            if self._current_results and self._current_output_path:
-                # create a filename indicating partial
-                out_path = self._current_output_path
-                p = Path(out_path)
-                partial_name = p.with_name(p.stem + "_partial" + p.suffix)
-                write_results_to_excel(self._current_results, str(partial_name))
-                self.status_label.config(text=f"تم حفظ النتائج الجزئية: {partial_name.name}")
-                messagebox.showinfo("مؤقت", f"تم حفظ النتائج الجزئية في:\n{partial_name}")
-        except Exception as e:
-            print(f"Error saving partial results: {e}")
-            messagebox.showerror("خطأ حفظ جزئي", f"خطأ أثناء حفظ النتائج الجزئية:\n{e}")
     
+    def _refresh_stats(self):
+        """Redraw the statistics panel periodically while a batch is running"""
+        self.update_stats_panel()
+        if self._processing:
+            self.root.after(500, self._refresh_stats)
+
+    def update_stats_panel(self):
+        """Show the current batch statistics in the stats panel"""
+        snap = self._stats.snapshot() if self._stats else {}
+
+        def fmt(value, pattern):
+            return "—" if value is None else pattern.format(value)
+
+        errors = snap.get('errors') or {}
+        error_text = "، ".join(f"{k}: {v}" for k, v in sorted(errors.items())) or "—"
+        text = (
+            f"السرعة: {fmt(snap.get('throughput'), '{:.2f}')} بحث/ث    "
+            f"قيد التنفيذ: {snap.get('in_flight', 0)}    "
+            f"زمن الاستجابة p50/p95: {fmt(snap.get('p50'), '{:.2f}')}/{fmt(snap.get('p95'), '{:.2f}')} ث\n"
+            f"نسبة الأخطاء: {fmt(snap.get('error_rate'), '{:.0%}')} ({error_text})    "
+            f"نسبة الذاكرة المؤقتة: {fmt(snap.get('cache_hit_ratio'), '{:.0%}')}"
+        )
+        self.stats_label.config(text=text)
+
     def update_result(self, text, clear=False):
         """Update the result text box"""
         self.text_result.config(state='normal')
@@ -2,6 +2,7 @@
 Main entry point for the Engineer Syndicate Lookup application
 """
 
+import argparse
 import tkinter as tk
 import sys
 from pathlib import Path
@@ -12,12 +13,23 @@ sys.path.insert(0, str(src_path))
 
 from gui.app_window import AppWindow
 from gui.styles import apply_theme
+from profiling import enable_profiling
 
 
 def main():
     """
     Launch the application
     """
+    parser = argparse.ArgumentParser(description="Engineer Syndicate Lookup")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile batch runs and write cProfile/tracemalloc reports next to the output workbook"
+    )
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling()
+
     root = tk.Tk()
     
     # Apply theme
@@ -0,0 +1,136 @@
+"""
+Optional profiling of batch runs with cProfile and tracemalloc
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+
+PROFILE_ENV_VAR = "SYNDICATE_PROFILE"
+
+# Number of allocation sites listed in the top-allocations report
+TOP_ALLOCATIONS = 30
+
+_enabled = False
+
+
+def enable_profiling(enabled: bool = True):
+    """Turn profiling of batch runs on or off for this process (e.g. from a CLI flag)."""
+    global _enabled
+    _enabled = enabled
+
+
+def profiling_enabled() -> bool:
+    """Return True if profiling was enabled by flag or by the SYNDICATE_PROFILE variable."""
+    if _enabled:
+        return True
+    return os.environ.get(PROFILE_ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _report_paths(output_path: str):
+    """Return the pstats and allocation report paths that sit next to the output workbook."""
+    p = Path(output_path)
+    return p.with_name(p.stem + "_profile.pstats"), p.with_name(p.stem + "_allocations.txt")
+
+
+def _write_allocation_report(path: Path, start: tracemalloc.Snapshot, end: tracemalloc.Snapshot):
+    """Write the largest allocation sites and their growth over the run to a text file."""
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [
+        f"Traced memory at end: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB",
+        "",
+        f"Top {TOP_ALLOCATIONS} allocation sites at end of run:",
+    ]
+    lines += [str(stat) for stat in end.statistics("lineno")[:TOP_ALLOCATIONS]]
+    lines += ["", f"Top {TOP_ALLOCATIONS} growth since start of run:"]
+    lines += [str(stat) for stat in end.compare_to(start, "lineno")[:TOP_ALLOCATIONS]]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _call(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+@contextmanager
+def profile_run(output_path: str, enabled: Optional[bool] = None):
+    """
+    Profile the wrapped block and write reports next to ``output_path``.
+
+    Writes ``<stem>_profile.pstats`` (load with ``python -m pstats``) and
+    ``<stem>_allocations.txt``. Does nothing unless profiling is enabled.
+
+    cProfile only sees the thread that enters the block, so the block receives a
+    ``profiled(fn, *args, **kwargs)`` helper: work handed to other threads should be
+    called through it to be profiled there too, and it is merged into the same report.
+    When profiling is off the helper just calls ``fn``.
+
+    :param output_path: Path of the workbook the batch run writes
+    :param enabled: Override the flag/environment setting
+    """
+    if enabled is None:
+        enabled = profiling_enabled()
+    if not enabled:
+        yield _call
+        return
+
+    stats_path, alloc_path = _report_paths(output_path)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    start_snapshot = tracemalloc.take_snapshot()
+    owner = threading.get_ident()
+    # Profiles of work finished on other threads, merged as each call returns so a call
+    # still running when the block ends (e.g. abandoned on Stop) is simply left out
+    worker_stats = []
+    worker_lock = threading.Lock()
+
+    def profiled(fn, *args, **kwargs):
+        if threading.get_ident() == owner:
+            return fn(*args, **kwargs)
+        worker = cProfile.Profile()
+        try:
+            worker.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from the one profiler already running
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            worker.disable()
+            with worker_lock:
+                if worker_stats:
+                    worker_stats[0].add(worker)
+                else:
+                    worker_stats.append(pstats.Stats(worker))
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiled
+    finally:
+        profiler.disable()
+        end_snapshot = tracemalloc.take_snapshot()
+        try:
+            stats = pstats.Stats(profiler)
+            with worker_lock:
+                for worker in worker_stats:
+                    stats.add(worker)
+            stats.dump_stats(str(stats_path))
+            _write_allocation_report(alloc_path, start_snapshot, end_snapshot)
+            summary = io.StringIO()
+            stats.stream = summary
+            stats.sort_stats("cumulative").print_stats(15)
+            print(summary.getvalue())
+            print(f"Profile written to {stats_path} and {alloc_path}")
+        except Exception as e:
+            print(f"Error writing profile reports: {e}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
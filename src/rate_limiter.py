@@ -0,0 +1,127 @@
+"""
+Token-bucket rate limiter shared between processes on the same machine
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+RATE_ENV_VAR = "SYNDICATE_MAX_RPS"
+DEFAULT_RATE = 2.0
+
+# Bucket state lives here so every process (GUI, scripts, cron jobs) draws from the same tokens
+DEFAULT_DB_PATH = Path(tempfile.gettempdir()) / "eea_syndicate_rate_limit.sqlite3"
+
+# The lock is only held for a few statements per request, so a longer wait means it is stuck
+BUSY_TIMEOUT = 2.0
+
+
+class RateLimiter:
+    """
+    Token bucket whose state is stored in a small SQLite table.
+
+    Each ``acquire`` takes the database write lock (``BEGIN IMMEDIATE``), refills the bucket
+    for the time elapsed since the last update and takes a token. When the bucket is empty
+    the token is reserved ahead of time (the balance goes negative) and the caller sleeps
+    until its slot, so waiters are served in order without polling. With the default burst
+    of one token, requests from all processes are spaced evenly at ``rate`` per second.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0, path: Optional[str] = None,
+                 name: str = "data.eea.org.eg", busy_timeout: float = BUSY_TIMEOUT):
+        """
+        :param rate: Requests per second allowed across all processes
+        :param burst: Bucket capacity, i.e. how many requests may go out back to back
+        :param path: SQLite database file holding the shared state
+        :param name: Bucket key, so unrelated limits can share one database
+        :param busy_timeout: Seconds to wait for the database lock before raising
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.path = str(path or DEFAULT_DB_PATH)
+        self.name = name
+        self.busy_timeout = busy_timeout
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+
+    def _reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            if row is None:
+                tokens = self.burst
+            else:
+                # Clamp elapsed so a clock jump backwards cannot drain the bucket
+                elapsed = max(0.0, now - row[1])
+                tokens = min(self.burst, row[0] + elapsed * self.rate)
+
+            tokens -= 1.0
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self.name, tokens, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Block until a request may be sent.
+
+        :param cancel_event: Stop waiting early when this event is set
+        :return: False if the wait was cut short by ``cancel_event``, True otherwise
+        """
+        wait = self._reserve()
+        if cancel_event is not None:
+            return not cancel_event.wait(wait) if wait > 0 else not cancel_event.is_set()
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+_default_limiter = None
+_default_limiter_rate = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Return the process-wide limiter configured by SYNDICATE_MAX_RPS.
+
+    Defaults to DEFAULT_RATE requests per second; a value of 0 disables limiting.
+    """
+    global _default_limiter, _default_limiter_rate
+    try:
+        rate = float(os.environ.get(RATE_ENV_VAR, DEFAULT_RATE))
+    except ValueError:
+        rate = DEFAULT_RATE
+    if rate <= 0:
+        return None
+    if _default_limiter is None or _default_limiter_rate != rate:
+        _default_limiter = RateLimiter(rate)
+        _default_limiter_rate = rate
+    return _default_limiter
@@ -5,18 +5,378 @@ Web scraper module for fetching engineer syndicate data from data.eea.org.eg
 import requests
 from bs4 import BeautifulSoup
 import re
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional
+
+try:
+    from .rate_limiter import get_rate_limiter
+except ImportError:
+    from rate_limiter import get_rate_limiter
 
 
 URL = "https://data.eea.org.eg/lastpaid.aspx"
 
+# WebForms hidden fields that must be echoed back with every postback
+HIDDEN_FIELDS = ("__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION", "txtdat")
+
+# Result inputs on the page returned by the search postback
+RESULT_FIELDS = ("txtSynd", "txtName")
+
+STREAM_CHUNK_SIZE = 8192
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Accept-Encoding": "gzip, deflate"
+}
+
+# Seconds a prefetched form (session + hidden fields) may be used after it was fetched
+WARM_FORM_TTL = 20.0
+
+
+class LookupCancelled(Exception):
+    """Raised when a lookup is aborted through its CancelToken."""
+
+
+class CancelToken:
+    """
+    Cancels one or more in-flight lookups from another thread.
+
+    Lookups register their session and responses with the token; ``cancel`` sets the
+    event they check between steps and closes everything registered. Closing a streamed
+    response aborts the body being read, so only lookups run with ``stream=True`` stop
+    mid-request. Closing the session does not interrupt a non-streamed request, whose
+    connection is checked out of the pool, and nothing interrupts a request still waiting
+    for response headers. Callers that must return immediately should stop waiting for
+    the lookup rather than joining it.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self._lock = threading.Lock()
+        self._open = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self):
+        """Cancel every lookup using this token."""
+        self.event.set()
+        with self._lock:
+            items, self._open = list(self._open), set()
+        for item in items:
+            try:
+                item.close()
+            except Exception:
+                pass
+
+    def check(self):
+        """Raise LookupCancelled if the token has been cancelled."""
+        if self.event.is_set():
+            raise LookupCancelled("Lookup cancelled.")
+
+    def register(self, item):
+        """Track a session or response so cancel() can close it."""
+        with self._lock:
+            self._open.add(item)
+        self.check()
+
+    def unregister(self, item):
+        with self._lock:
+            self._open.discard(item)
+
+
+# Start of an <input> tag, and the name/id attributes inside one
+_INPUT_START = re.compile(rb"<input\b", re.IGNORECASE)
+_NAME_ATTR = re.compile(rb"\b(?:name|id)\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+
+
+def _read_until_fields(response: requests.Response, fields, chunk_size: int = STREAM_CHUNK_SIZE,
+                       cancel: Optional[CancelToken] = None) -> str:
+    """
+    Read a streamed response only until every input in ``fields`` has been seen.
+
+    The rest of the body (mostly VIEWSTATE and page chrome) is never downloaded; the
+    connection is closed as soon as the last wanted tag is complete. If a field never
+    appears the whole body is read, so the caller sees the same page as a normal request.
+    Each byte is scanned once: the search resumes where the previous chunk left off,
+    including inside a long tag such as __VIEWSTATE whose end has not arrived yet.
+
+    :param response: Response opened with ``stream=True``
+    :param fields: Names/ids of the <input> tags to wait for
+    :param cancel: Abort between chunks when this token is cancelled
+    :return: The decoded prefix of the body containing all found tags
+    """
+    pending = {f.encode() for f in fields}
+    buf = bytearray()
+    pos = 0            # where to look for the next "<input"
+    tag_start = None   # start of an <input> tag whose ">" has not arrived yet
+    end_from = 0       # where to resume looking for that tag's ">"
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if cancel is not None:
+                cancel.check()
+            buf.extend(chunk)
+            while pending:
+                if tag_start is None:
+                    m = _INPUT_START.search(buf, pos)
+                    if m is None:
+                        # Keep the tail in case "<input" is split across chunks
+                        pos = max(pos, len(buf) - len(b"<input") + 1)
+                        break
+                    tag_start, end_from = m.start(), m.end()
+                end = buf.find(b">", end_from)
+                if end < 0:
+                    end_from = len(buf)
+                    break
+                for name in _NAME_ATTR.findall(buf, tag_start, end):
+                    pending.discard(bytes(name))
+                pos, tag_start = end + 1, None
+            if not pending:
+                break
+    finally:
+        response.close()
+    return bytes(buf).decode(response.encoding or "utf-8", errors="replace")
+
+
+def _extract_inputs(html: str, names, attr: str = "name") -> dict:
+    """
+    Extract the ``value`` of <input> tags from a (possibly truncated) HTML page.
+
+    :param html: Page source
+    :param names: Input names (or ids, see ``attr``) to look up
+    :param attr: Attribute used to match the tags, 'name' or 'id'
+    :return: Dictionary mapping each name to its value, or None if the tag is missing
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    values = {}
+    for n in names:
+        tag = soup.find("input", {attr: n})
+        values[n] = tag.get("value") if tag else None
+    return values
+
+
+def _extract_inputs_batch(jobs) -> list:
+    """Run _extract_inputs for a list of (html, names, attr) jobs; executed in pool workers."""
+    return [_extract_inputs(html, names, attr) for html, names, attr in jobs]
+
 
-def get_engineer_syndicate(national_id: str) -> dict:
+class ParsePool:
+    """
+    Extract input fields from response bodies in worker processes.
+
+    Parsing with BeautifulSoup is CPU bound and holds the GIL, so with many lookup threads
+    it caps throughput at one core. Threads hand their bodies to ``extract``, which blocks
+    until the result is back; a dispatcher thread groups bodies arriving within
+    ``max_delay`` seconds (up to ``batch_size``) into one task so the pickling and IPC
+    cost is paid per batch rather than per page.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, batch_size: int = 8, max_delay: float = 0.005):
+        """
+        :param max_workers: Number of parser processes (defaults to the CPU count)
+        :param batch_size: Maximum number of bodies sent to a worker in one task
+        :param max_delay: Seconds to wait for more bodies before sending a partial batch
+        """
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._queue = queue.Queue()
+        # Guards _closed so nothing is queued behind the shutdown sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def extract(self, html: str, names, attr: str = "name",
+                cancel: Optional[CancelToken] = None) -> dict:
+        """
+        Same as _extract_inputs, but parsed in a worker process.
+
+        :param cancel: Stop waiting for the result when this token is cancelled
+        :raises RuntimeError: if the pool has been closed
+        :raises LookupCancelled: if ``cancel`` was cancelled before the result arrived
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ParsePool is closed.")
+            self._queue.put((html, tuple(names), attr, future))
+        if cancel is None:
+            return future.result()
+        while True:
+            cancel.check()
+            try:
+                return future.result(timeout=0.05)
+            except FutureTimeout:
+                pass
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Finish this batch, then let the outer loop see the sentinel
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._submit(batch)
+
+    def _submit(self, batch):
+        futures = [f for _, _, _, f in batch]
+        try:
+            task = self._executor.submit(_extract_inputs_batch, [(h, n, a) for h, n, a, _ in batch])
+        except Exception as e:
+            for f in futures:
+                f.set_exception(e)
+            return
+
+        def done(task):
+            try:
+                results = task.result()
+            except Exception as e:
+                for f in futures:
+                    f.set_exception(e)
+                return
+            for f, r in zip(futures, results):
+                f.set_result(r)
+
+        task.add_done_callback(done)
+
+    def close(self):
+        """Stop the dispatcher and shut down the worker processes. Safe to call twice."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# After the shared limiter database fails, requests skip it until this monotonic time
+LIMITER_RETRY_AFTER = 300.0
+_limiter_retry_at = None
+
+
+def _throttle(cancel: Optional[CancelToken] = None):
+    """
+    Wait for the shared rate limiter (SYNDICATE_MAX_RPS) before sending a request.
+
+    If the limiter's SQLite file cannot be used (locked, read-only, corrupt), the error is
+    reported and the limiter is skipped for LIMITER_RETRY_AFTER seconds, so lookups go out
+    unthrottled instead of each one waiting out the database busy timeout.
+    """
+    global _limiter_retry_at
+    if _limiter_retry_at is None or time.monotonic() >= _limiter_retry_at:
+        try:
+            limiter = get_rate_limiter()
+            if limiter is not None:
+                limiter.acquire(cancel.event if cancel is not None else None)
+            _limiter_retry_at = None
+        except sqlite3.Error as e:
+            _limiter_retry_at = time.monotonic() + LIMITER_RETRY_AFTER
+            print(f"Rate limiter unavailable, continuing without throttling for "
+                  f"{LIMITER_RETRY_AFTER:.0f}s: {e}")
+    if cancel is not None:
+        cancel.check()
+
+
+# Form fetched ahead of time by warm_up_form: {"session", "form", "fetched_at"}
+_warm_lock = threading.Lock()
+_warm_form = None
+
+
+def _is_fresh(warm: Optional[dict], max_age: float) -> bool:
+    return warm is not None and time.monotonic() - warm["fetched_at"] < max_age
+
+
+def has_warm_form(max_age: float = WARM_FORM_TTL) -> bool:
+    """Return True if a prefetched form is ready for the next lookup."""
+    with _warm_lock:
+        return _is_fresh(_warm_form, max_age)
+
+
+def warm_up_form(max_age: float = WARM_FORM_TTL):
+    """
+    Fetch the search form ahead of a lookup so the next one only needs the POST.
+
+    Opens a session (leaving its keep-alive connection in the pool) and stores the fresh
+    WebForms hidden fields. Does nothing if a fresh form is already waiting. The stored
+    form is used at most once and is discarded after ``max_age`` seconds, so stale
+    VIEWSTATE tokens are never submitted.
+
+    :raises requests.exceptions.RequestException: if the form page cannot be fetched
+    """
+    global _warm_form
+    if has_warm_form(max_age):
+        return
+
+    session = requests.Session()
+    try:
+        _throttle()
+        r = session.get(URL, headers=HEADERS, timeout=15)
+        r.raise_for_status()
+        form = _extract_inputs(r.text, HIDDEN_FIELDS)
+    except Exception:
+        session.close()
+        raise
+
+    with _warm_lock:
+        old, _warm_form = _warm_form, {"session": session, "form": form, "fetched_at": time.monotonic()}
+    if old is not None:
+        old["session"].close()
+
+
+def _take_warm_form(max_age: float = WARM_FORM_TTL) -> Optional[dict]:
+    """Remove and return the prefetched form if it is still fresh, else discard it."""
+    global _warm_form
+    with _warm_lock:
+        warm, _warm_form = _warm_form, None
+    if warm is not None and not _is_fresh(warm, max_age):
+        warm["session"].close()
+        return None
+    return warm
+
+
+def get_engineer_syndicate(national_id: str, stream: bool = False,
+                           parse_pool: Optional[ParsePool] = None,
+                           cancel: Optional[CancelToken] = None,
+                           use_warm_form: bool = False) -> dict:
     """
     Fetches the engineer sub-syndicate (النقابة الفرعية) and name using the Egyptian National ID.
     
     :param national_id: 14-digit Egyptian national number
+    :param stream: Stream both responses and stop reading as soon as the needed inputs
+        have been seen, instead of downloading the full WebForms page
+    :param parse_pool: Parse the responses in this process pool instead of the calling thread
+    :param cancel: Token that aborts the lookup when cancelled from another thread
+    :param use_warm_form: Skip the GET when warm_up_form has a fresh form ready
     :return: Dictionary with 'syndicate' and 'name' keys
     :raises ValueError: if input validation fails
+    :raises LookupCancelled: if ``cancel`` was cancelled before the lookup finished
     :raises Exception: if request fails or data not found
     """
 
@@ -27,68 +387,112 @@ def get_engineer_syndicate(national_id: str) -> dict:
     if not re.fullmatch(r"\d{14}", national_id):
         raise ValueError("National number must be exactly 14 digits.")
 
+    if cancel is None:
+        cancel = CancelToken()
+
+    if parse_pool is not None:
+        def extract(html, names, attr="name"):
+            return parse_pool.extract(html, names, attr, cancel=cancel)
+    else:
+        extract = _extract_inputs
+
     # ------------------ Session ------------------
-    session = requests.Session()
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
+    warm = _take_warm_form() if use_warm_form else None
+    session = warm["session"] if warm is not None else requests.Session()
 
-    # ------------------ Step 1: GET ------------------
-    r = session.get(URL, headers=headers, timeout=15)
-    r.raise_for_status()
-
-    soup = BeautifulSoup(r.text, "html.parser")
-
-    def get_val(name):
-        tag = soup.find("input", {"name": name})
-        return tag["value"] if tag else ""
-
-    # ------------------ Step 2: POST ------------------
-    payload = {
-        "__EVENTTARGET": "",
-        "__EVENTARGUMENT": "",
-        "__LASTFOCUS": "",
-        "__VIEWSTATE": get_val("__VIEWSTATE"),
-        "__VIEWSTATEGENERATOR": get_val("__VIEWSTATEGENERATOR"),
-        "__EVENTVALIDATION": get_val("__EVENTVALIDATION"),
-        "txtdat": get_val("txtdat"),
-        "TextBox1": "",
-        "TextBox2": "",
-        "OldRefID": "",
-        "TextBox3": "",
-        "NationalNumber": national_id,
-        "btnSearch": "بحث"
-    }
+    try:
+        cancel.register(session)
+
+        # ------------------ Step 1: GET ------------------
+        if warm is not None:
+            form = warm["form"]
+        else:
+            _throttle(cancel)
+            r = session.get(URL, headers=HEADERS, timeout=15, stream=stream)
+            r.raise_for_status()
+
+            if stream:
+                cancel.register(r)
+                html = _read_until_fields(r, HIDDEN_FIELDS, cancel=cancel)
+                cancel.unregister(r)
+            else:
+                html = r.text
+            form = extract(html, HIDDEN_FIELDS)
 
-    res = session.post(URL, data=payload, headers=headers, timeout=15)
-    res.raise_for_status()
+        def get_val(name):
+            return form[name] or ""
 
-    soup = BeautifulSoup(res.text, "html.parser")
+        # ------------------ Step 2: POST ------------------
+        payload = {
+            "__EVENTTARGET": "",
+            "__EVENTARGUMENT": "",
+            "__LASTFOCUS": "",
+            "__VIEWSTATE": get_val("__VIEWSTATE"),
+            "__VIEWSTATEGENERATOR": get_val("__VIEWSTATEGENERATOR"),
+            "__EVENTVALIDATION": get_val("__EVENTVALIDATION"),
+            "txtdat": get_val("txtdat"),
+            "TextBox1": "",
+            "TextBox2": "",
+            "OldRefID": "",
+            "TextBox3": "",
+            "NationalNumber": national_id,
+            "btnSearch": "بحث"
+        }
+
+        _throttle(cancel)
+        res = session.post(URL, data=payload, headers=HEADERS, timeout=15, stream=stream)
+        res.raise_for_status()
+
+        if stream:
+            cancel.register(res)
+            html = _read_until_fields(res, RESULT_FIELDS + HIDDEN_FIELDS, cancel=cancel)
+            cancel.unregister(res)
+        else:
+            html = res.text
+        cancel.check()
+    except requests.exceptions.RequestException as e:
+        # Closing the session from cancel() surfaces as a connection error
+        if cancel.cancelled:
+            raise LookupCancelled("Lookup cancelled.") from e
+        if warm is not None and isinstance(e, requests.exceptions.ConnectionError):
+            # The server dropped the idle prefetched connection; do a normal lookup instead
+            return get_engineer_syndicate(national_id, stream=stream, parse_pool=parse_pool, cancel=cancel)
+        raise
+    finally:
+        cancel.unregister(session)
+        session.close()
 
     # ------------------ Step 3: Extract Data ------------------
-    synd = soup.find("input", {"id": "txtSynd"})
-    if not synd or not synd.get("value"):
+    fields = extract(html, RESULT_FIELDS, attr="id")
+    synd = fields["txtSynd"]
+    if not synd:
         raise Exception("No data found for this national number.")
 
-    name = soup.find("input", {"id": "txtName"})
-    name_value = name["value"].strip() if name and name.get("value") else ""
+    name_value = fields["txtName"].strip() if fields["txtName"] else ""
 
     return {
-        "syndicate": synd["value"].strip(),
+        "syndicate": synd.strip(),
         "name": name_value
     }
 
 
-def get_engineer_syndicate_safe(national_id: str) -> dict:
+def get_engineer_syndicate_safe(national_id: str, stream: bool = False,
+                                parse_pool: Optional[ParsePool] = None,
+                                cancel: Optional[CancelToken] = None,
+                                use_warm_form: bool = False) -> dict:
     """
     Safe wrapper around get_engineer_syndicate that returns a dict with status.
     
     :param national_id: 14-digit Egyptian national number
+    :param stream: Passed through to get_engineer_syndicate
+    :param parse_pool: Passed through to get_engineer_syndicate
+    :param cancel: Passed through to get_engineer_syndicate
+    :param use_warm_form: Passed through to get_engineer_syndicate
     :return: Dictionary with 'success', 'national_id', 'syndicate', 'name', and optionally 'error' keys
     """
     try:
-        data = get_engineer_syndicate(national_id)
+        data = get_engineer_syndicate(national_id, stream=stream, parse_pool=parse_pool, cancel=cancel,
+                                      use_warm_form=use_warm_form)
         return {
             "success": True,
             "national_id": national_id,
@@ -101,6 +505,12 @@ def get_engineer_syndicate_safe(national_id: str) -> dict:
             "national_id": national_id,
             "error": f"Validation Error: {str(e)}"
         }
+    except LookupCancelled as e:
+        return {
+            "success": False,
+            "national_id": national_id,
+            "error": f"Cancelled: {str(e)}"
+        }
     except requests.exceptions.RequestException as e:
         return {
             "success": False,
@@ -0,0 +1,91 @@
+"""
+Unit tests for the batch_stats module
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add src to path
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+import batch_stats
+from batch_stats import BatchStats, categorize_error, _percentile
+
+
+class TestBatchStats(unittest.TestCase):
+    """Test cases for throughput, latency and error statistics"""
+
+    def _run(self, stats, clock, intervals, results=None):
+        """Feed completed lookups to stats with the given gaps between them"""
+        for n, dt in enumerate(intervals):
+            stats.start_lookup()
+            clock.return_value += dt
+            result = results[n] if results else {'success': True}
+            stats.finish_lookup(dt, result)
+
+    def test_categorize_error(self):
+        """Test that error messages map to their categories"""
+        self.assertEqual(categorize_error("Network Error: timed out"), "network")
+        self.assertEqual(categorize_error("Validation Error: bad"), "validation")
+        self.assertEqual(categorize_error("No data found for this national number."), "no_data")
+        self.assertEqual(categorize_error("boom"), "other")
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles on odd and even length lists"""
+        self.assertEqual(_percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(_percentile(list(range(1, 10)), 50), 5)
+        self.assertEqual(_percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(_percentile(list(range(1, 21)), 95), 19)
+        self.assertEqual(_percentile([7], 95), 7)
+        self.assertIsNone(_percentile([], 50))
+
+    def test_ewma_throughput_and_eta(self):
+        """Test that a single stall only moves the smoothed throughput partially"""
+        with mock.patch.object(batch_stats.time, "monotonic") as clock:
+            clock.return_value = 100.0
+            stats = BatchStats(alpha=0.5)
+            self._run(stats, clock, [1.0, 1.0, 1.0])
+            self.assertAlmostEqual(stats.throughput(), 1.0)
+            self.assertAlmostEqual(stats.eta(10), 10.0)
+
+            self._run(stats, clock, [5.0])
+            self.assertAlmostEqual(stats.throughput(), 1 / 3.0)
+
+            # While nothing completes the estimate decays with the time since the last result
+            clock.return_value += 6.0
+            self.assertAlmostEqual(stats.throughput(), 1 / 6.0)
+
+    def test_snapshot(self):
+        """Test latency percentiles, error rate and cache ratio in the snapshot"""
+        with mock.patch.object(batch_stats.time, "monotonic") as clock:
+            clock.return_value = 0.0
+            stats = BatchStats()
+            results = [{'success': True}] * 3 + [{'success': False, 'error': 'Network Error: x'}]
+            self._run(stats, clock, [0.1, 0.2, 0.3, 0.4], results)
+            stats.start_lookup()
+
+            snap = stats.snapshot()
+            self.assertEqual(snap['completed'], 4)
+            self.assertEqual(snap['in_flight'], 1)
+            self.assertAlmostEqual(snap['p50'], 0.2)
+            self.assertAlmostEqual(snap['p95'], 0.4)
+            self.assertAlmostEqual(snap['error_rate'], 0.25)
+            self.assertEqual(snap['errors'], {'network': 1})
+            self.assertIsNone(snap['cache_hit_ratio'])
+
+
+    def test_abandoned_lookup_leaves_flight(self):
+        """Test that a lookup given up on Stop is no longer counted as in flight"""
+        stats = BatchStats()
+        stats.start_lookup()
+        stats.abandon_lookup()
+        snap = stats.snapshot()
+        self.assertEqual(snap['in_flight'], 0)
+        self.assertEqual(snap['completed'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
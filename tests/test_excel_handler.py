@@ -0,0 +1,207 @@
+"""
+Unit tests for the excel_handler module
+"""
+
+import re
+import unittest
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+# Add repository root to path so excel_handler can import the scraper as src.scraper
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from src.excel_handler import append_syndicate_to_excel, read_national_ids_from_excel, _read_id_columns
+
+
+def _fake_lookup(national_id):
+    """Stand-in for get_engineer_syndicate_safe that never touches the network"""
+    return {
+        "success": True,
+        "national_id": national_id,
+        "syndicate": f"Synd {national_id[-2:]}",
+        "name": f"Name {national_id[-2:]}"
+    }
+
+
+class TestReadIdColumns(unittest.TestCase):
+    """Test cases for reading only the National ID column"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self._tmp.name) / "wide.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["ANAME", None, "Dept", "الرقم القومى", "Phone"])
+        ws.append(["أحمد", "x", "IT", 29709101300615, "0100"])
+        ws.append(["سارة", "y", "HR", None, "0101"])
+        ws.append(["علي", "z", "HR", "29501011234567.0", "0102"])
+        wb.save(self.path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_loads_only_id_column(self):
+        """Test that only the detected ID column is loaded"""
+        df, id_col = _read_id_columns(self.path)
+        self.assertEqual(id_col, "الرقم القومى")
+        self.assertEqual(list(df.columns), ["الرقم القومى"])
+        self.assertEqual(list(df[id_col]), ["29709101300615", None, "29501011234567.0"])
+
+    def test_extra_columns_when_present(self):
+        """Test that extra columns are loaded only if the sheet has them"""
+        df, _ = _read_id_columns(self.path, extra_columns=("Dept", "Syndicate"))
+        self.assertEqual(list(df.columns), ["الرقم القومى", "Dept"])
+        self.assertEqual(list(df["Dept"]), ["IT", "HR", "HR"])
+
+    def test_read_national_ids(self):
+        """Test that IDs are cleaned and blanks dropped"""
+        self.assertEqual(read_national_ids_from_excel(self.path), ["29709101300615", "29501011234567"])
+
+    def test_missing_id_column(self):
+        """Test that a sheet without an ID column is reported"""
+        pd.DataFrame({"ANAME": ["x"]}).to_excel(self.path, index=False)
+        with self.assertRaises(Exception) as ctx:
+            read_national_ids_from_excel(self.path)
+        self.assertIn("Could not find a National ID column", str(ctx.exception))
+
+
+class TestAppendSyndicate(unittest.TestCase):
+    """Test cases for append_syndicate_to_excel"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self._tmp.name) / "ids.xlsx")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run(self, **kwargs):
+        with mock.patch("src.scraper.get_engineer_syndicate_safe", side_effect=_fake_lookup) as lookup:
+            append_syndicate_to_excel(self.path, **kwargs)
+        return lookup
+
+    def test_full_run_looks_up_every_row(self):
+        """Test that a normal run looks up all rows without adding a timestamp column"""
+        pd.DataFrame({"National ID": ["29501011234501", "29501011234502"]}).to_excel(self.path, index=False)
+        lookup = self._run()
+        self.assertEqual(lookup.call_count, 2)
+        df = pd.read_excel(self.path, dtype=str)
+        self.assertEqual(list(df["Syndicate"]), ["Synd 01", "Synd 02"])
+        self.assertNotIn("Last Checked", df.columns)
+
+    def test_incremental_run_records_check_time(self):
+        """Test that an incremental run records when each row was looked up"""
+        pd.DataFrame({"National ID": ["29501011234501", "29501011234502"]}).to_excel(self.path, index=False)
+        self._run(incremental=True)
+        df = pd.read_excel(self.path, dtype=str)
+        self.assertTrue(df["Last Checked"].notna().all())
+
+    def test_incremental_only_retries_missing_and_failed(self):
+        """Test that incremental mode skips rows that already succeeded"""
+        now = pd.Timestamp.now().isoformat(timespec='seconds')
+        pd.DataFrame({
+            "National ID": ["29501011234501", "29501011234502", "29501011234503"],
+            "Name": ["Kept", None, None],
+            "Syndicate": ["Cairo", "Network Error: timed out", None],
+            "Last Checked": [now, now, None],
+        }).to_excel(self.path, index=False)
+
+        lookup = self._run(incremental=True)
+        self.assertEqual([c.args[0] for c in lookup.call_args_list],
+                         ["29501011234502", "29501011234503"])
+        df = pd.read_excel(self.path, dtype=str)
+        self.assertEqual(list(df["Syndicate"]), ["Cairo", "Synd 02", "Synd 03"])
+        self.assertEqual(df["Name"][0], "Kept")
+
+    def test_incremental_retries_stale_rows(self):
+        """Test that rows checked before the staleness cutoff are looked up again"""
+        old = (pd.Timestamp.now() - pd.Timedelta(days=30)).isoformat(timespec='seconds')
+        now = pd.Timestamp.now().isoformat(timespec='seconds')
+        pd.DataFrame({
+            "National ID": ["29501011234501", "29501011234502"],
+            "Syndicate": ["Cairo", "Giza"],
+            "Last Checked": [old, now],
+        }).to_excel(self.path, index=False)
+
+        lookup = self._run(incremental=True, max_age_days=7)
+        self.assertEqual([c.args[0] for c in lookup.call_args_list], ["29501011234501"])
+
+    def test_unexpected_errors_are_retried(self):
+        """Test that a bare exception message is recorded as an error and retried next run"""
+        pd.DataFrame({"National ID": ["29501011234501"]}).to_excel(self.path, index=False)
+        failure = {"success": False, "national_id": "29501011234501", "error": "'value'"}
+        with mock.patch("src.scraper.get_engineer_syndicate_safe", return_value=failure):
+            append_syndicate_to_excel(self.path, incremental=True)
+        df = pd.read_excel(self.path, dtype=str)
+        self.assertEqual(df["Syndicate"][0], "Error: 'value'")
+
+        lookup = self._run(incremental=True)
+        self.assertEqual(lookup.call_count, 1)
+
+    def test_max_age_requires_incremental(self):
+        """Test that a staleness limit without incremental mode is rejected"""
+        pd.DataFrame({"National ID": ["29501011234501"]}).to_excel(self.path, index=False)
+        with self.assertRaises(ValueError):
+            append_syndicate_to_excel(self.path, max_age_days=7)
+
+    def test_in_place_reads_cached_values_of_formula_ids(self):
+        """Test that an ID column built from formulas is looked up by its cached values"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["Raw", "National ID"])
+        ws.append([29501011234501, '=TEXT(A2,"0")'])
+        ws.append([29501011234502, '=TEXT(A3,"0")'])
+        wb.save(self.path)
+        # openpyxl cannot write cached results, so add them the way Excel stores them
+        with zipfile.ZipFile(self.path) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+        sheet = parts["xl/worksheets/sheet1.xml"].decode()
+        sheet = re.sub(r'<c r="B(\d)"><f>TEXT\(A\d,"0"\)</f><v ?/>',
+                       lambda m: f'<c r="B{m.group(1)}" t="str"><f>TEXT(A{m.group(1)},"0")</f>'
+                                 f'<v>2950101123450{int(m.group(1)) - 1}</v>',
+                       sheet)
+        parts["xl/worksheets/sheet1.xml"] = sheet.encode()
+        with zipfile.ZipFile(self.path, "w") as zf:
+            for name, data in parts.items():
+                zf.writestr(name, data)
+
+        lookup = self._run()
+        self.assertEqual([c.args[0] for c in lookup.call_args_list],
+                         ["29501011234501", "29501011234502"])
+        ws = load_workbook(self.path).worksheets[0]
+        self.assertEqual(ws["B2"].value, '=TEXT(A2,"0")')
+        self.assertEqual(ws["D2"].value, "Synd 01")
+
+    def test_in_place_write_preserves_workbook(self):
+        """Test that results are added without dropping formatting, formulas or other sheets"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["National ID", "Count"])
+        ws.append(["29501011234501", 2])
+        ws.append(["29501011234502", 3])
+        ws["B4"] = "=SUM(B2:B3)"
+        ws["A1"].font = Font(bold=True)
+        wb.create_sheet("Notes")["A1"] = "keep me"
+        wb.save(self.path)
+
+        self._run()
+        wb = load_workbook(self.path)
+        ws = wb.worksheets[0]
+        self.assertTrue(ws["A1"].font.bold)
+        self.assertEqual(ws["B4"].value, "=SUM(B2:B3)")
+        self.assertEqual(wb["Notes"]["A1"].value, "keep me")
+        self.assertEqual([c.value for c in ws[1]], ["National ID", "Count", "Name", "Syndicate"])
+        self.assertEqual(ws["D2"].value, "Synd 01")
+        self.assertEqual(ws["D3"].value, "Synd 02")
+
+
+if __name__ == '__main__':
+    unittest.main()
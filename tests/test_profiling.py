@@ -0,0 +1,77 @@
+"""
+Unit tests for the profiling module
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add src to path
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+import profiling
+from profiling import profile_run
+
+
+class TestProfileRun(unittest.TestCase):
+    """Test cases for profiling batch runs"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+        self.output = str(self.dir / "results.xlsx")
+        profiling.enable_profiling(False)
+
+    def tearDown(self):
+        profiling.enable_profiling(False)
+        self._tmp.cleanup()
+
+    def _work(self):
+        return [str(i) * 10 for i in range(1000)]
+
+    def test_writes_reports_when_enabled(self):
+        """Test that reports are written next to the output workbook"""
+        with profile_run(self.output, enabled=True):
+            self._work()
+        self.assertTrue((self.dir / "results_profile.pstats").exists())
+        alloc = self.dir / "results_allocations.txt"
+        self.assertTrue(alloc.exists())
+        self.assertIn("Top", alloc.read_text(encoding="utf-8"))
+
+    def test_profiles_work_on_other_threads(self):
+        """Test that work run through the profiled helper on a worker thread is reported"""
+        import pstats
+        from concurrent.futures import ThreadPoolExecutor
+
+        def worker_only_function():
+            return self._work()
+
+        with profile_run(self.output, enabled=True) as profiled:
+            with ThreadPoolExecutor(max_workers=1) as ex:
+                self.assertEqual(len(ex.submit(profiled, worker_only_function).result()), 1000)
+        stats = pstats.Stats(str(self.dir / "results_profile.pstats"))
+        names = {func[2] for func in stats.stats}
+        self.assertIn("worker_only_function", names)
+
+    @mock.patch.dict(os.environ, {"SYNDICATE_PROFILE": ""})
+    def test_does_nothing_when_disabled(self):
+        """Test that no reports are written when profiling is off"""
+        with profile_run(self.output) as profiled:
+            self.assertEqual(len(profiled(self._work)), 1000)
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+    @mock.patch.dict(os.environ, {"SYNDICATE_PROFILE": "1"})
+    def test_environment_variable_enables(self):
+        """Test that SYNDICATE_PROFILE=1 turns profiling on"""
+        self.assertTrue(profiling.profiling_enabled())
+        with profile_run(self.output):
+            self._work()
+        self.assertTrue((self.dir / "results_profile.pstats").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
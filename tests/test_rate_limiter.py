@@ -0,0 +1,57 @@
+"""
+Unit tests for the rate_limiter module
+"""
+
+import unittest
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from rate_limiter import RateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the shared token bucket"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = str(Path(self._tmp.name) / "bucket.sqlite3")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_invalid_rate(self):
+        """Test that a non-positive rate is rejected"""
+        with self.assertRaises(ValueError):
+            RateLimiter(0, path=self.db)
+
+    def test_limiters_share_one_bucket(self):
+        """Test that separate limiters on the same database share the ceiling"""
+        # Two instances stand in for two processes using the same state file
+        a = RateLimiter(20, path=self.db)
+        b = RateLimiter(20, path=self.db)
+        start = time.monotonic()
+        for _ in range(5):
+            a.acquire()
+            b.acquire()
+        elapsed = time.monotonic() - start
+        # First token is free, the other nine are spaced 1/20s apart
+        self.assertGreaterEqual(elapsed, 9 / 20 - 0.02)
+
+    def test_separate_buckets_do_not_interfere(self):
+        """Test that limiters with different names keep their own tokens"""
+        a = RateLimiter(1, path=self.db, name="a")
+        b = RateLimiter(1, path=self.db, name="b")
+        start = time.monotonic()
+        a.acquire()
+        b.acquire()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
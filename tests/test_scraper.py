@@ -4,13 +4,18 @@ Unit tests for the scraper module
 
 import unittest
 import sys
+import os
+import threading
 from pathlib import Path
+from unittest import mock
 
 # Add src to path
 src_path = Path(__file__).parent.parent / 'src'
 sys.path.insert(0, str(src_path))
 
-from scraper import get_engineer_syndicate_safe
+import scraper
+from scraper import (get_engineer_syndicate_safe, _read_until_fields, _extract_inputs, ParsePool,
+                     CancelToken, LookupCancelled)
 
 
 class TestScraper(unittest.TestCase):
@@ -55,6 +60,220 @@ class TestScraper(unittest.TestCase):
             self.assertIn('error', result)
 
 
+class _ChunkedResponse:
+    """Fake streamed response that counts how many chunks were consumed"""
+
+    encoding = "utf-8"
+
+    def __init__(self, body, chunk=16):
+        self.chunks = [body[i:i + chunk] for i in range(0, len(body), chunk)]
+        self.consumed = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for c in self.chunks:
+            self.consumed += 1
+            yield c
+
+    def close(self):
+        self.closed = True
+
+
+class TestStreamedParsing(unittest.TestCase):
+    """Test cases for early-terminating response reading"""
+
+    PAGE = (
+        '<form><input type="hidden" name="__VIEWSTATE" value="abc" />'
+        '<input name="txtName" id="txtName" value=" أحمد " />'
+        '<input name="txtSynd" id="txtSynd" value="القاهرة" />'
+        + "<p>filler</p>" * 200 + "</form>"
+    ).encode("utf-8")
+
+    def test_stops_after_fields_found(self):
+        """Test that reading stops once every wanted input has been seen"""
+        resp = _ChunkedResponse(self.PAGE)
+        html = _read_until_fields(resp, ("txtSynd", "txtName"))
+        self.assertLess(resp.consumed, len(resp.chunks))
+        self.assertTrue(resp.closed)
+        fields = _extract_inputs(html, ("txtSynd", "txtName"), attr="id")
+        self.assertEqual(fields["txtSynd"], "القاهرة")
+        self.assertEqual(fields["txtName"].strip(), "أحمد")
+
+    def test_long_tag_spanning_chunks(self):
+        """Test that a tag split over many chunks is found once its end arrives"""
+        page = b'<input type="hidden" name="__VIEWSTATE" value="' + b"A" * 5000 + b'" /><p>tail</p>' * 50
+        resp = _ChunkedResponse(page, chunk=64)
+        html = _read_until_fields(resp, ("__VIEWSTATE",))
+        self.assertLess(resp.consumed, len(resp.chunks))
+        self.assertEqual(len(_extract_inputs(html, ("__VIEWSTATE",))["__VIEWSTATE"]), 5000)
+
+    def test_reads_everything_when_field_missing(self):
+        """Test that a missing field makes the whole body be read"""
+        resp = _ChunkedResponse(self.PAGE)
+        html = _read_until_fields(resp, ("txtSynd", "txtMissing"))
+        self.assertEqual(resp.consumed, len(resp.chunks))
+        self.assertIsNone(_extract_inputs(html, ("txtMissing",), attr="id")["txtMissing"])
+
+
+class TestCancellation(unittest.TestCase):
+    """Test cases for cancelling lookups"""
+
+    def test_cancelled_token_skips_lookup(self):
+        """Test that a cancelled token aborts before any request is sent"""
+        token = CancelToken()
+        token.cancel()
+        result = get_engineer_syndicate_safe("29501011234567", cancel=token)
+        self.assertFalse(result['success'])
+        self.assertTrue(result['error'].startswith('Cancelled'))
+
+    def test_cancel_closes_registered_response(self):
+        """Test that cancel() closes registered responses and stops a streamed read"""
+        token = CancelToken()
+        resp = _ChunkedResponse(b"<p>filler</p>" * 100)
+        token.register(resp)
+
+        def chunks(chunk_size=1):
+            for n, c in enumerate(resp.chunks):
+                if n == 3:
+                    token.cancel()
+                yield c
+
+        resp.iter_content = chunks
+        with self.assertRaises(LookupCancelled):
+            _read_until_fields(resp, ("txtSynd",), cancel=token)
+        self.assertTrue(resp.closed)
+
+
+class TestThrottle(unittest.TestCase):
+    """Test cases for waiting on the shared rate limiter"""
+
+    def tearDown(self):
+        scraper._limiter_retry_at = None
+
+    def test_locked_limiter_database_is_skipped(self):
+        """Test that a locked limiter database costs one busy timeout, then is bypassed"""
+        import sqlite3
+        import tempfile
+        import time
+        from rate_limiter import RateLimiter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "bucket.sqlite3")
+            limiter = RateLimiter(100.0, path=path, busy_timeout=0.2)
+            holder = sqlite3.connect(path, isolation_level=None)
+            holder.execute("BEGIN EXCLUSIVE")
+            try:
+                with mock.patch.object(scraper, "get_rate_limiter", return_value=limiter), \
+                        mock.patch("builtins.print") as printed:
+                    start = time.perf_counter()
+                    scraper._throttle()
+                    first = time.perf_counter() - start
+                    start = time.perf_counter()
+                    for _ in range(5):
+                        scraper._throttle(CancelToken())
+                    rest = time.perf_counter() - start
+            finally:
+                holder.execute("ROLLBACK")
+                holder.close()
+
+        self.assertLess(first, 2.0)
+        self.assertLess(rest, 0.1)
+        printed.assert_called_once()
+
+    def test_limiter_is_retried_after_backoff(self):
+        """Test that the limiter is used again once the backoff has passed"""
+        limiter = mock.Mock()
+        scraper._limiter_retry_at = scraper.time.monotonic() - 1
+        with mock.patch.object(scraper, "get_rate_limiter", return_value=limiter):
+            scraper._throttle()
+        limiter.acquire.assert_called_once()
+        self.assertIsNone(scraper._limiter_retry_at)
+
+
+class _FakeSession:
+    """Session stand-in whose POST returns a result page"""
+
+    def __init__(self):
+        self.closed = False
+        self.get = mock.Mock(side_effect=AssertionError("GET should be skipped"))
+        page = '<input id="txtSynd" value="القاهرة" /><input id="txtName" value="أحمد" />'
+        self.post = mock.Mock(return_value=mock.Mock(text=page, raise_for_status=lambda: None))
+
+    def close(self):
+        self.closed = True
+
+
+@mock.patch.dict(os.environ, {"SYNDICATE_MAX_RPS": "0"})
+class TestWarmForm(unittest.TestCase):
+    """Test cases for prefetching the search form"""
+
+    def tearDown(self):
+        scraper._warm_form = None
+
+    def _store(self, age):
+        session = _FakeSession()
+        scraper._warm_form = {
+            "session": session,
+            "form": {name: "v" for name in scraper.HIDDEN_FIELDS},
+            "fetched_at": scraper.time.monotonic() - age,
+        }
+        return session
+
+    def test_warm_form_skips_get_and_is_used_once(self):
+        """Test that a fresh prefetched form is used for the POST and then discarded"""
+        session = self._store(age=1)
+        self.assertTrue(scraper.has_warm_form())
+        result = get_engineer_syndicate_safe("29501011234567", use_warm_form=True)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['syndicate'], "القاهرة")
+        self.assertEqual(session.post.call_args.kwargs["data"]["__VIEWSTATE"], "v")
+        self.assertFalse(scraper.has_warm_form())
+
+    def test_stale_form_is_discarded(self):
+        """Test that an expired prefetched form is closed instead of submitted"""
+        session = self._store(age=scraper.WARM_FORM_TTL + 1)
+        self.assertFalse(scraper.has_warm_form())
+        self.assertIsNone(scraper._take_warm_form())
+        self.assertTrue(session.closed)
+        session.post.assert_not_called()
+
+
+class TestParsePool(unittest.TestCase):
+    """Test cases for parsing in worker processes"""
+
+    def test_matches_in_thread_parsing(self):
+        """Test that pooled extraction returns the same fields, also for concurrent batches"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        pages = [
+            f'<input name="__VIEWSTATE" value="vs{i}" /><input id="txtSynd" value="s{i}" />'
+            for i in range(20)
+        ]
+        with ParsePool(max_workers=1, batch_size=4) as pool:
+            with ThreadPoolExecutor(max_workers=8) as ex:
+                pooled = list(ex.map(lambda p: pool.extract(p, ("txtSynd",), attr="id"), pages))
+            self.assertEqual(pool.extract(pages[0], ("__VIEWSTATE",)), {"__VIEWSTATE": "vs0"})
+        self.assertEqual(pooled, [_extract_inputs(p, ("txtSynd",), attr="id") for p in pages])
+
+    def test_cancel_stops_waiting_for_result(self):
+        """Test that a cancelled token ends the wait for a pooled parse"""
+        token = CancelToken()
+        with ParsePool(max_workers=1) as pool:
+            # Hold the dispatcher back so the result cannot arrive before the cancel
+            with mock.patch.object(pool, "_submit"):
+                threading.Timer(0.1, token.cancel).start()
+                with self.assertRaises(LookupCancelled):
+                    pool.extract('<input name="x" value="1" />', ("x",), cancel=token)
+
+    def test_extract_after_close_raises(self):
+        """Test that a closed pool rejects new work instead of blocking forever"""
+        pool = ParsePool(max_workers=1)
+        pool.close()
+        pool.close()
+        with self.assertRaises(RuntimeError):
+            pool.extract('<input name="x" value="1" />', ("x",))
+
+
 class TestScraperIntegration(unittest.TestCase):
     """Integration tests that require network access"""
     